@@ -1,21 +1,27 @@
 import sys
 import os
 import json
+import math
 import ctypes
+import ctypes.wintypes
 import threading
+import time
 from datetime import datetime, timedelta, timezone, time as dtime
-import requests
 import logging
+try:
+    import orjson
+except ImportError:  # stdlib json is fine, just slower
+    orjson = None
 from PyQt5 import QtWidgets, QtGui, QtCore
 
-import shutil
+# shutil, mmap, http.client, email.utils and ntplib are imported where they are
+# used, keeping them off the login-time startup path
 import winreg  # only works on Windows
-import filecmp
 
-# Logging configuration
+# Logging configuration (set ACCOUNT_LOCKER_DEBUG=1 for debug output)
 log_path = os.path.join(os.getenv('APPDATA', os.getcwd()), 'locker.log')
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.DEBUG if os.getenv('ACCOUNT_LOCKER_DEBUG') else logging.INFO,
     format='%(asctime)s %(levelname)s: %(message)s',
     filename=log_path,
     filemode='a'
@@ -29,63 +35,354 @@ DEFAULT_CONFIG = {
     'lock_time': '18:00',
     'unlock_time': '06:00',      # ← new default unlock time
     'days': list(range(7)),
-    'enabled': True
+    'enabled': True,
+    'relock_continuously': False  # lock only on entering the window by default
 }
+# Reuse a cached time offset for this long before hitting the network again
+OFFSET_TTL = 30 * 60
+# Fetches younger than this are shared between the tray app and the dialog
+SHARED_OFFSET_TTL = 30
+# Smaller offset changes are jitter: not worth rewriting the config for,
+# nor rescheduling the pending lock check
+OFFSET_TOLERANCE = 1.0
+
+MINUTES_PER_DAY = 24 * 60
+# Re-lock cadence inside the lock window, and the longest single wait
+# before re-checking the schedule (absorbs clock changes and sleep)
+RELOCK_INTERVAL = 60
+MAX_CHECK_WAIT = 15 * 60
+
+NTP_SERVER = 'pool.ntp.org'
+
+ERROR_ALREADY_EXISTS = 183
+# Held for the life of the process; the kernel drops it when we exit
+_instance_mutex = None
+
+# Kept-alive HTTPS connection to Google, shared by all time syncs
+_gconn = None
+_gconn_lock = threading.Lock()
 
 import hashlib 
+import hmac
 
 
         
-def hash_password(pw):
-    return hashlib.sha256(pw.encode('utf-8')).hexdigest()
+def _parse_http_date(date_str):
+    from email.utils import parsedate_to_datetime
+    # HTTP-dates are always GMT; guard against a naive result anyway
+    dt = parsedate_to_datetime(date_str)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def _fetch_google_date():
+    import http.client
+    global _gconn
+    with _gconn_lock:
+        while True:
+            reused = _gconn is not None
+            try:
+                if _gconn is None:
+                    _gconn = http.client.HTTPSConnection('www.google.com', 443, timeout=5)
+                _gconn.request('HEAD', '/')
+                resp = _gconn.getresponse()
+                resp.read()
+                return resp.getheader('Date')
+            except BaseException as e:
+                # never leave a half-used connection behind
+                if _gconn is not None:
+                    _gconn.close()
+                _gconn = None
+                # Google drops idle keep-alive connections, so a failure on a
+                # reused one gets a single retry; a fresh one failing is final
+                if not reused or not isinstance(e, (http.client.HTTPException, OSError)):
+                    raise
+
+def fetch_time_offset():
+    """Return network time minus system time, or None if unavailable."""
+    try:
+        import ntplib
+    except ImportError:  # fall back to Google's Date header only
+        ntplib = None
+    if ntplib is not None:
+        try:
+            resp = ntplib.NTPClient().request(NTP_SERVER, version=3, timeout=5)
+            # NTP timestamps on both ends already correct for the round trip
+            return timedelta(seconds=resp.offset)
+        except Exception as e:
+            logging.warning('NTP query failed, falling back to Google: %s', e)
+    date_str = _fetch_google_date()
+    if not date_str:
+        return None
+    return _parse_http_date(date_str) - datetime.now(timezone.utc)
+
+def acquire_single_instance():
+    """Return False if another Account Locker is already running in this session."""
+    global _instance_mutex
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    # declare the real HANDLE type so 64-bit handles aren't truncated to int
+    kernel32.CreateMutexW.restype = ctypes.wintypes.HANDLE
+    kernel32.CreateMutexW.argtypes = (
+        ctypes.wintypes.LPVOID, ctypes.wintypes.BOOL, ctypes.wintypes.LPCWSTR
+    )
+    _instance_mutex = kernel32.CreateMutexW(None, False, 'Local\\AccountLockerMutex')
+    if not _instance_mutex:
+        # fail open: running unguarded beats not locking at all
+        logging.error('CreateMutexW failed (error %d), skipping single-instance check',
+                      ctypes.get_last_error())
+        return True
+    return ctypes.get_last_error() != ERROR_ALREADY_EXISTS
+
+def dump_json(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=4).encode('utf-8')
+
+def load_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _find_next(i, mask):
+    """Days from weekday i to the next weekday set in mask (0 if i itself), or None."""
+    for k in range(7):
+        if (mask >> ((i + k) % 7)) & 1:
+            return k
+    return None
+
+SCRYPT_PARAMS = {'n': 2 ** 14, 'r': 8, 'p': 1}
+
+def hash_password(pw, salt=None):
+    salt = os.urandom(16) if salt is None else salt
+    digest = hashlib.scrypt(pw.encode('utf-8'), salt=salt, **SCRYPT_PARAMS)
+    return {'alg': 'scrypt', 'salt': salt.hex(), 'hash': digest.hex()}
+
+def check_password(pw, stored):
+    """Return (matches, is_legacy) for pw against a stored password hash."""
+    if isinstance(stored, dict):
+        expected = hash_password(pw, bytes.fromhex(stored['salt']))['hash']
+        return hmac.compare_digest(expected, stored['hash']), False
+    # older configs store an unsalted SHA-256 hex digest
+    legacy = hashlib.sha256(pw.encode('utf-8')).hexdigest()
+    return hmac.compare_digest(legacy, stored), True
 
 class Config:
-    def __init__(self, path=CONFIG_PATH):
+    def __init__(self, path=CONFIG_PATH, data=None):
         self.path = path
         self.data = {}
-        self.load()
+        self._last_serialized = None
+        self._mtime = None
+        if data is None:
+            self.load()
+        else:
+            self.data = data
+            self._reparse()
 
     def load(self):
         if os.path.exists(self.path):
-            with open(self.path, 'r') as f:
-                self.data = json.load(f)
+            # file untouched since we last read or wrote it: nothing to reparse
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            self.data = load_json(raw)
+            self._last_serialized = raw
+            self._mtime = mtime
             # inject default unlock_time if missing
             if 'unlock_time' not in self.data:
                 self.data['unlock_time'] = DEFAULT_CONFIG['unlock_time']
-            logging.debug(f'Loaded config: {self.data}')
+            self.data.setdefault('relock_continuously', DEFAULT_CONFIG['relock_continuously'])
+            logging.debug('Loaded config: %s', self.data)
         else:
             self.data = DEFAULT_CONFIG.copy()
             logging.debug('Using default config')
+        self._reparse()
 
     def save(self):
-        with open(self.path, 'w') as f:
-            json.dump(self.data, f, indent=4)
-        logging.debug(f'Saved config: {self.data}')
+        blob = dump_json(self.data)
+        if blob == self._last_serialized:
+            logging.debug('Config unchanged, skipping save')
+            return
+        # write a temp file and swap it in, so a crash never leaves a torn config
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._last_serialized = blob
+        self._mtime = os.stat(self.path).st_mtime_ns
+        logging.debug('Saved config: %s', self.data)
+        self._reparse()
+
+    def _reparse(self):
+        # parse the schedule once so per-tick checks are plain comparisons
+        lock_h, lock_m     = map(int, self.data['lock_time'].split(':'))
+        unlock_h, unlock_m = map(int, self.data['unlock_time'].split(':'))
+        self.lock_t   = dtime(lock_h, lock_m)
+        self.unlock_t = dtime(unlock_h, unlock_m)
+        # bit d set <=> weekday d active
+        self.days_mask = sum(1 << d for d in set(self.data['days']))
+        self.next_active = [_find_next(i, self.days_mask) for i in range(7)]
+        # minutes since midnight; a window with lock == unlock covers the whole day
+        self.lock_minutes   = lock_h * 60 + lock_m
+        self.unlock_minutes = unlock_h * 60 + unlock_m
+        span = (self.unlock_minutes - self.lock_minutes) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        # bit m set <=> minute m of the day is locked (window wraps past midnight)
+        bits = ((1 << span) - 1) << self.lock_minutes
+        day_mask = (bits | (bits >> MINUTES_PER_DAY)) & ((1 << MINUTES_PER_DAY) - 1)
+        # bit m set <=> minute m since Monday 00:00 is locked
+        self.week_mask = sum(day_mask << (d * MINUTES_PER_DAY) for d in range(7)
+                             if (self.days_mask >> d) & 1)
+
+    def should_lock(self, now):
+        now_m = now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+        return bool(self.data['enabled'] and (self.week_mask >> now_m) & 1)
+
+    def next_transition(self, now):
+        """Return (datetime, is_lock) for the next change of should_lock(), or None."""
+        if not self.data['enabled']:
+            return None
+        locked = self.should_lock(now)
+        # when unlocked, nothing can happen before the next active day
+        start = 0 if locked else self.next_active[now.weekday()]
+        if start is None:
+            return None
+        # the schedule can only change state at midnight or at the lock/unlock times
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        edges = sorted({dtime(0), self.lock_t, self.unlock_t})
+        for i in range(start, start + 8):
+            day = midnight + timedelta(days=i)
+            for t in edges:
+                dt = day.replace(hour=t.hour, minute=t.minute)
+                if dt > now and self.should_lock(dt) != locked:
+                    return dt, not locked
+        return None
+
+class TimeSyncSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+
+class TimeSyncWorker(QtCore.QRunnable):
+    """Runs fetch_time_offset() on the thread pool; emits the offset, None or the error."""
+    def __init__(self):
+        super().__init__()
+        self.signals = TimeSyncSignals()
+
+    def run(self):
+        try:
+            result = fetch_time_offset()
+        except Exception as e:
+            result = e
+        self.signals.finished.emit(result)
+
+class NetworkTimeSource(QtCore.QObject):
+    """Network time offset shared by the tray app and the setup dialog."""
+    offsetChanged = QtCore.pyqtSignal(object)
+    fetchFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        self.config = config
+        # seed from the last offset persisted in the config
+        self.offset = timedelta(seconds=config.data.get('offset_seconds', 0))
+        # cache age is measured on the monotonic clock so changing the system
+        # clock can't keep a stale offset alive; a saved timestamp is only
+        # trusted if it lies in the past
+        self._fetched_at = None
+        saved_ts = config.data.get('offset_ts')
+        if saved_ts is not None:
+            saved_age = time.time() - saved_ts
+            if saved_age >= 0:
+                self._fetched_at = time.monotonic() - saved_age
+        self._fetching = False
+
+    def request_update(self, max_age=SHARED_OFFSET_TTL):
+        if self._fetched_at is not None and 0 <= time.monotonic() - self._fetched_at < max_age:
+            logging.debug('Using cached time offset: %s', self.offset)
+            self.offsetChanged.emit(self.offset)
+            return
+        if self._fetching:
+            return
+        self._fetching = True
+        worker = TimeSyncWorker()
+        worker.signals.finished.connect(self.on_result, QtCore.Qt.QueuedConnection)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def on_result(self, result):
+        self._fetching = False
+        if isinstance(result, Exception):
+            logging.error('Time sync failed: %s', result)
+            self.fetchFailed.emit('Error')
+            return
+        if result is None:
+            self.fetchFailed.emit('N/A')
+            return
+        self.offset = result
+        self._fetched_at = time.monotonic()
+        logging.debug('Time offset (network - system): %s', self.offset)
+        # don't create the config file before first-run setup has saved it
+        if os.path.exists(self.config.path) and self._saved_offset_stale(result):
+            self.config.data['offset_seconds'] = result.total_seconds()
+            self.config.data['offset_ts'] = time.time()
+            self.config.save()
+        self.offsetChanged.emit(result)
+
+    def _saved_offset_stale(self, offset):
+        data = self.config.data
+        if 'offset_ts' not in data or 'offset_seconds' not in data:
+            return True
+        if not 0 <= time.time() - data['offset_ts'] < OFFSET_TTL:
+            return True
+        return abs(offset.total_seconds() - data['offset_seconds']) > OFFSET_TOLERANCE
 
 class SetupDialog(QtWidgets.QDialog):
-    def __init__(self, config, first_run=False):
+    def __init__(self, config, time_source, first_run=False):
         super().__init__()
         self.config = config
+        self.time_source = time_source
         self.first_run = first_run
         self.local_tz = datetime.now().astimezone().tzinfo
-        self.offset = timedelta(0)
+        self.offset = time_source.offset
         self.latest_google_time = None
+        # unsaved copy of the schedule, kept in sync with the widgets
+        self.preview = Config(config.path, data=dict(config.data))
         self.setWindowTitle('Account Locker Setup')
         self.init_ui()
-        # Initial fetch and start timers
-        self.update_google_time()
+        # timers only run while the dialog is visible
         self.google_timer = QtCore.QTimer(self)
+        self.google_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
         self.google_timer.timeout.connect(self.update_google_time)
-        self.google_timer.start(60 * 1000)
         self.countdown_timer = QtCore.QTimer(self)
-        self.countdown_timer.timeout.connect(self.update_countdown)
-        self.countdown_timer.start(1000)
+        self.countdown_timer.setSingleShot(True)
+        self.countdown_timer.timeout.connect(self.countdown_tick)
 
-        self.time_edit.timeChanged.connect(self.update_countdown)
-        self.unlock_edit.timeChanged.connect(self.update_countdown)
-        self.enable_cb.stateChanged.connect(self.update_countdown)
+        self.time_edit.timeChanged.connect(self.refresh_preview)
+        self.unlock_edit.timeChanged.connect(self.refresh_preview)
+        self.enable_cb.stateChanged.connect(self.refresh_preview)
         for cb in self.day_checks:
-            cb.stateChanged.connect(self.update_countdown)
+            cb.stateChanged.connect(self.refresh_preview)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.time_source.offsetChanged.connect(self.on_google_time)
+        self.time_source.fetchFailed.connect(self.google_time_label.setText)
+        self.update_google_time()
+        self.google_timer.start(60 * 1000)
+        self.countdown_tick()
+
+    def hideEvent(self, event):
+        self.google_timer.stop()
+        self.countdown_timer.stop()
+        self.time_source.offsetChanged.disconnect(self.on_google_time)
+        self.time_source.fetchFailed.disconnect(self.google_time_label.setText)
+        super().hideEvent(event)
+
+    def countdown_tick(self):
+        self.update_countdown()
+        # re-arm on the next wall-clock second so the label changes once per second
+        now = datetime.now(self.local_tz) + self.offset
+        self.countdown_timer.start(1000 - now.microsecond // 1000)
 
     def init_ui(self):
         layout = QtWidgets.QFormLayout(self)
@@ -118,9 +415,13 @@ class SetupDialog(QtWidgets.QDialog):
         self.enable_cb = QtWidgets.QCheckBox('Enable Schedule')
         self.enable_cb.setChecked(self.config.data['enabled'])
         layout.addRow('Enabled:', self.enable_cb)
+        # Re-lock every minute inside the window, not just when it starts
+        self.relock_cb = QtWidgets.QCheckBox('Keep re-locking during lock window')
+        self.relock_cb.setChecked(self.config.data['relock_continuously'])
+        layout.addRow('', self.relock_cb)
         # Google time display
         self.google_time_label = QtWidgets.QLabel('Fetching...')
-        layout.addRow('Google Time:', self.google_time_label)
+        layout.addRow('Network Time:', self.google_time_label)
         # Countdown display
         self.time_until_label = QtWidgets.QLabel('Calculating...')
         layout.addRow('Time Until Lock:', self.time_until_label)
@@ -191,73 +492,39 @@ class SetupDialog(QtWidgets.QDialog):
 
 
     def update_google_time(self):
-        try:
-            r = requests.head('https://www.google.com', timeout=5)
-            date_str = r.headers.get('Date')
-            if date_str:
-                dt_utc = datetime.strptime(
-                    date_str, '%a, %d %b %Y %H:%M:%S GMT'
-                ).replace(tzinfo=timezone.utc)
-                dt_local = dt_utc.astimezone(self.local_tz)
-                sys_local = datetime.now(self.local_tz)
-                self.offset = dt_local - sys_local
-                self.latest_google_time = dt_local
-                text = dt_local.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                text = 'N/A'
-        except Exception as e:
-            logging.error(f"Google time fetch error: {e}")
-            text = 'Error'
-        self.google_time_label.setText(text)
+        # fetched off the GUI thread; the result arrives via on_google_time
+        self.time_source.request_update()
+
+    def on_google_time(self, offset):
+        self.offset = offset
+        dt_local = datetime.now(self.local_tz) + offset
+        self.latest_google_time = dt_local
+        self.google_time_label.setText(dt_local.strftime('%Y-%m-%d %H:%M:%S'))
+        self.update_countdown()
+
+    def schedule_values(self):
+        return {
+            'enabled':     self.enable_cb.isChecked(),
+            'lock_time':   self.time_edit.time().toString('HH:mm'),
+            'unlock_time': self.unlock_edit.time().toString('HH:mm'),
+            'days':        [i for i, cb in enumerate(self.day_checks) if cb.isChecked()],
+            'relock_continuously': self.relock_cb.isChecked(),
+        }
+
+    def refresh_preview(self):
+        self.preview.data.update(self.schedule_values())
+        self.preview._reparse()
         self.update_countdown()
 
     def update_countdown(self):
         now = datetime.now(self.local_tz) + self.offset
 
-        lock_str   = self.time_edit.time().toString('HH:mm')
-        unlock_str = self.unlock_edit.time().toString('HH:mm')
-        lock_h, lock_m     = map(int, lock_str.split(':'))
-        unlock_h, unlock_m = map(int, unlock_str.split(':'))
-        days = [i for i, cb in enumerate(self.day_checks) if cb.isChecked()]
-        enabled = self.enable_cb.isChecked()
-
-        if not enabled or now.weekday() not in days:
-            self.time_until_label.setText('N/A')
-            return
-
-        now_t = now.time()
-        lock_t   = dtime(lock_h, lock_m)
-        unlock_t = dtime(unlock_h, unlock_m)
-
-        # Determine next event: next lock if outside window, next unlock if inside
-        if lock_t < unlock_t:
-            in_window = (lock_t <= now_t < unlock_t)
-        else:
-            in_window = (now_t >= lock_t) or (now_t < unlock_t)
-
-        # compute next transition datetime
-        next_dt = None
-        for i in range(7):
-            d = (now.weekday() + i) % 7
-            if d not in days:
-                continue
-            base = (now + timedelta(days=i)).replace(
-                hour=lock_h if not in_window else unlock_h,
-                minute=lock_m if not in_window else unlock_m,
-                second=0, microsecond=0
-            )
-            # if window spans midnight and we're computing unlock for next day
-            if in_window and lock_t >= unlock_t and d == now.weekday():
-                # if we've passed today's unlock time, schedule next day's unlock
-                if now_t >= unlock_t:
-                    base += timedelta(days=1)
-            if base > now:
-                next_dt = base
-                break
-
-        if not next_dt:
+        # next lock if outside the window, next unlock if inside
+        nxt = self.preview.next_transition(now)
+        if not nxt:
             self.time_until_label.setText('N/A')
             return
+        next_dt, _ = nxt
 
         delta = next_dt - now
         d, rem = delta.days, delta.seconds
@@ -274,15 +541,20 @@ class SetupDialog(QtWidgets.QDialog):
                 QtWidgets.QMessageBox.warning(self, 'Error', 'Passwords do not match or are empty')
                 return
             self.config.data['password_hash'] = hash_password(pw1)
-        self.config.data['enabled']     = self.enable_cb.isChecked()
-        self.config.data['lock_time']   = self.time_edit.time().toString('HH:mm')
-        self.config.data['unlock_time'] = self.unlock_edit.time().toString('HH:mm')
-        self.config.data['days']        = [i for i, cb in enumerate(self.day_checks) if cb.isChecked()]
+        self.config.data.update(self.schedule_values())
         self.config.save()
         super().accept()
         
         
-def add_to_startup():
+def file_digest(path):
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap can't map empty files
+            return hashlib.blake2b(b'', digest_size=16).hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm, digest_size=16).hexdigest()
+
+def add_to_startup(config):
     try:
         # Get current executable or script path
         current_path = sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__)
@@ -292,14 +564,34 @@ def add_to_startup():
         dest_name = "AccountLocker.exe" if current_path.lower().endswith(".exe") else "account_locker_copy.py"
         dest_path = os.path.join(startup_dir, dest_name)
 
-        if not os.path.exists(dest_path) or not filecmp.cmp(current_path, dest_path, shallow=False):
-            shutil.copy2(current_path, dest_path)
+        # copy2 preserves mtime, so matching stat means the copy is current
+        src_st = os.stat(current_path)
+        if os.path.exists(dest_path):
+            dest_st = os.stat(dest_path)
+            if src_st.st_size == dest_st.st_size and src_st.st_mtime_ns == dest_st.st_mtime_ns:
+                logging.debug('Startup copy already exists')
+                return
 
-            logging.info(f'Copied self to startup: {dest_path}')
+        # stat differs: compare contents; the cached digest is reused only
+        # while the source itself is unchanged
+        import shutil
+        src_stat = [src_st.st_size, src_st.st_mtime_ns]
+        if config.data.get('self_stat') == src_stat and config.data.get('self_hash'):
+            src_hash = config.data['self_hash']
+        else:
+            src_hash = file_digest(current_path)
+        if os.path.exists(dest_path) and src_hash == file_digest(dest_path):
+            # same bytes: sync the timestamps so the stat check passes next time
+            shutil.copystat(current_path, dest_path)
+            logging.debug('Startup copy already up to date')
         else:
-            logging.debug('Startup copy already exists')
+            shutil.copy2(current_path, dest_path)
+            logging.info('Copied self to startup: %s', dest_path)
+        config.data['self_hash'] = src_hash
+        config.data['self_stat'] = src_stat
+        config.save()
     except Exception as e:
-        logging.error(f"Failed to copy to startup: {e}")
+        logging.error('Failed to copy to startup: %s', e)
 
         
 class LockerApp(QtWidgets.QSystemTrayIcon):
@@ -307,15 +599,17 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
         super().__init__(icon, parent)
         self.app = parent
         self.config = Config()
-        add_to_startup()
+        self.time_source = NetworkTimeSource(self.config, self)
 
         self.failed_attempts = 0
         if not os.path.exists(self.config.path):
-            dlg = SetupDialog(self.config, first_run=True)
+            dlg = SetupDialog(self.config, self.time_source, first_run=True)
             if dlg.exec_() != QtWidgets.QDialog.Accepted:
                 sys.exit()
+        # after first-run setup, so saving the hash can't skip the setup dialog
+        add_to_startup(self.config)
         self.local_tz = datetime.now().astimezone().tzinfo
-        logging.debug(f'Local timezone: {self.local_tz}')
+        logging.debug('Local timezone: %s', self.local_tz)
         # Tray menu
         self.menu = QtWidgets.QMenu()
         self.menu.addAction('Force Lock Now', self.lock_workstation)
@@ -333,65 +627,76 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
         self.show()
         # Timers
         self.offset = timedelta(0)
+        self._was_in_window = False
+        self._next_lock_dt = None
+        # single-shot timer re-armed for the next schedule transition
+        self.check_timer = QtCore.QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.check_timer.timeout.connect(self.check_lock)
+        self._arm_next()
+        self.time_source.offsetChanged.connect(self.on_offset_changed)
         self.sync_time()
         self.sync_timer = QtCore.QTimer(self)
+        self.sync_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
         self.sync_timer.timeout.connect(self.sync_time)
         self.sync_timer.start(3600 * 1000)
-        self.check_timer = QtCore.QTimer(self)
-        self.check_timer.timeout.connect(self.check_lock)
-        self.check_timer.start(60 * 1000)
 
             
     def sync_time(self):
-        def work():
-            try:
-                r = requests.head('https://www.google.com', timeout=5)
-                date_str = r.headers.get('Date')
-                if date_str:
-                    dt_utc = datetime.strptime(
-                        date_str, '%a, %d %b %Y %H:%M:%S GMT'
-                    ).replace(tzinfo=timezone.utc)
-                    dt_local = dt_utc.astimezone(self.local_tz)
-                    sys_local = datetime.now(self.local_tz)
-                    self.offset = dt_local - sys_local
-                    logging.debug(f'Time offset (google_local - sys_local): {self.offset}')
-            except Exception as e:
-                logging.error(f'Time sync failed: {e}')
-        threading.Thread(target=work, daemon=True).start()
+        # reuses the persisted offset while it is younger than OFFSET_TTL
+        self.time_source.request_update(max_age=OFFSET_TTL)
+
+    def on_offset_changed(self, offset):
+        # re-arming restarts the relative wait, so only do it when the
+        # offset really moved; cached re-emits would postpone the check
+        if abs((offset - self.offset).total_seconds()) <= OFFSET_TOLERANCE:
+            return
+        self.offset = offset
+        self._arm_next()
 
     def current_time(self):
         return datetime.now(self.local_tz) + self.offset
 
-    def check_lock(self):
+    def _arm_next(self):
         now = self.current_time()
-        cfg = self.config.data
-
-        if not cfg['enabled'] or now.weekday() not in cfg['days']:
-            return
-
-        # parse lock/unlock
-        lock_h, lock_m       = map(int, cfg['lock_time'].split(':'))
-        unlock_h, unlock_m   = map(int, cfg['unlock_time'].split(':'))
-        now_t    = now.time()
-        lock_t   = dtime(lock_h, lock_m)
-        unlock_t = dtime(unlock_h, unlock_m)
-
-        # determine if we're in the lock‑window
-        if lock_t < unlock_t:
-            in_window = (lock_t <= now_t < unlock_t)
+        in_window = self.config.should_lock(now)
+        if in_window and (self.config.data['relock_continuously'] or not self._was_in_window):
+            wait = RELOCK_INTERVAL
         else:
-            in_window = (now_t >= lock_t) or (now_t < unlock_t)
+            wait = MAX_CHECK_WAIT
+        nxt = self.config.next_transition(now)
+        self._next_lock_dt = None
+        if nxt:
+            wait = min(wait, (nxt[0] - now).total_seconds())
+            # remember when the next lock is due, even if an unlock comes first
+            if not nxt[1]:
+                nxt = self.config.next_transition(nxt[0])
+            if nxt:
+                self._next_lock_dt = nxt[0]
+        # round up so the timer never fires just short of the transition
+        self.check_timer.start(max(0, math.ceil(wait * 1000)))
+        logging.debug('Next schedule check in %.0fs', wait)
 
-        if in_window:
+    def check_lock(self):
+        now = self.current_time()
+        in_window = self.config.should_lock(now)
+        # lock on entering the window (or if a scheduled lock was missed, e.g.
+        # asleep across an unlock), so a manual unlock inside it sticks
+        missed = self._next_lock_dt is not None and now >= self._next_lock_dt
+        if in_window and (self.config.data['relock_continuously']
+                          or not self._was_in_window or missed):
             logging.info('Scheduled lock triggered')
             self.lock_workstation()
+        self._was_in_window = in_window
+        self._arm_next()
 
     def lock_workstation(self):
         logging.info('Locking workstation')
         try:
             ctypes.windll.user32.LockWorkStation()
         except Exception as e:
-            logging.error(f'Lock failed: {e}')
+            logging.error('Lock failed: %s', e)
 
     def verify(self):
         pw, ok = QtWidgets.QInputDialog.getText(
@@ -404,7 +709,13 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
             return False
 
         # correct password?
-        if hash_password(pw) == self.config.data['password_hash']:
+        ok, legacy = check_password(pw, self.config.data['password_hash'])
+        if ok:
+            if legacy:
+                # upgrade the old SHA-256 hash now that we know the password
+                self.config.data['password_hash'] = hash_password(pw)
+                self.config.save()
+                logging.info('Upgraded password hash to scrypt')
             # reset counter & tooltip
             self.failed_attempts = 0
             self.setToolTip('Account Locker')
@@ -412,7 +723,7 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
 
         # on failure
         self.failed_attempts += 1
-        logging.warning(f'Password attempt failed ({self.failed_attempts} total)')
+        logging.warning('Password attempt failed (%d total)', self.failed_attempts)
         QtWidgets.QMessageBox.warning(
             None,
             'Error',
@@ -425,8 +736,9 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
 
     def open_settings(self):
         if self.verify():
-            dlg = SetupDialog(self.config)
+            dlg = SetupDialog(self.config, self.time_source)
             dlg.exec_()
+            self._arm_next()
             self.toggle.setText(
                 'Disable Schedule' if self.config.data['enabled'] else 'Enable Schedule'
             )
@@ -435,6 +747,7 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
         if self.verify():
             self.config.data['enabled'] = not self.config.data['enabled']
             self.config.save()
+            self._arm_next()
             self.toggle.setText(
                 'Disable Schedule' if self.config.data['enabled'] else 'Enable Schedule'
             )
@@ -444,6 +757,9 @@ class LockerApp(QtWidgets.QSystemTrayIcon):
             QtWidgets.QApplication.quit()
 
 if __name__ == '__main__':
+    if not acquire_single_instance():
+        logging.info('Another instance is already running, exiting')
+        sys.exit(0)
     app = QtWidgets.QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     icon_path = os.path.join(os.path.dirname(__file__), 'icon.png')